@@ -1,7 +1,6 @@
 from fastapi import FastAPI, APIRouter
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
@@ -14,10 +13,15 @@ from datetime import datetime, timezone
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage: "mongo" (default, needs MONGO_URL/DB_NAME) or "sqlite" (SQLITE_PATH, ":memory:" for in-process;
+# single worker only)
+from storage import create_storage
+storage = create_storage(
+    os.environ.get('STORAGE_BACKEND', 'mongo'),
+    mongo_url=os.environ.get('MONGO_URL'),
+    db_name=os.environ.get('DB_NAME'),
+    sqlite_path=os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'portfolio.db')),
+)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -54,13 +58,12 @@ async def create_status_check(input: StatusCheckCreate):
     doc = status_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.status_checks.insert_one(doc)
+    _ = await storage.status.insert(doc)
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+    status_checks = await storage.status.list()
     
     # Convert ISO string timestamps back to datetime objects
     for check in status_checks:
@@ -162,96 +165,223 @@ class ContactMessage(BaseModel):
     message: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-# ===================== Helpers =====================
-
-def collection(name: str):
-    return db[name]
+# ===================== Trusted Reads =====================
+from fastapi.responses import JSONResponse
+from storage import SCHEMA_VERSION_FIELD
+
+# Bump when a model change means stored documents have to be re-validated (and migrated) on read
+SCHEMA_VERSION = 1
+TRUSTED_READS = os.environ.get("TRUSTED_READS", "1") != "0"
+
+def stamped(data: dict) -> dict:
+    data[SCHEMA_VERSION_FIELD] = SCHEMA_VERSION
+    return data
+
+async def read_docs(model, docs: List[dict], upgrade=None) -> List[dict]:
+    """Serializable form of stored documents. Current-version documents were validated on write,
+    so they are only trimmed to the model's fields; older ones go through the model and, when
+    `upgrade` is given, the migrated copy is written back."""
+    out = []
+    for doc in docs:
+        if TRUSTED_READS and doc.get(SCHEMA_VERSION_FIELD) == SCHEMA_VERSION:
+            out.append({k: doc[k] for k in model.model_fields if k in doc})
+            continue
+        data = model(**doc).model_dump()
+        if TRUSTED_READS and upgrade:
+            await upgrade(stamped(dict(data)))
+        out.append(data)
+    return out
+
+# ===================== Live Updates (SSE) =====================
+import asyncio
+import json
+from typing import Set
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", "64"))
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", "15"))
+
+class Broadcaster:
+    """In-process fan-out of small change events. Publishing never waits: a client whose queue
+    is full is sent a final `reset` event (refetch everything) and disconnected."""
+
+    RESET = {"type": "reset"}
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.closed = False
+
+    def subscribe(self) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=self.queue_size)
+        if self.closed:
+            q.put_nowait(None)
+        else:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self.subscribers.discard(q)
+
+    def _evict(self, q: asyncio.Queue, last):
+        self.subscribers.discard(q)
+        while not q.empty():
+            q.get_nowait()
+        q.put_nowait(last)
+
+    def publish(self, event: dict):
+        for q in list(self.subscribers):
+            try:
+                q.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(q, self.RESET)
+
+    def open(self):
+        self.closed = False
+
+    def close(self):
+        # None ends every open stream; streams opened afterwards end immediately
+        self.closed = True
+        for q in list(self.subscribers):
+            self._evict(q, None)
+
+# Opened on startup and closed on shutdown. uvicorn waits for open connections before it runs the
+# shutdown hooks, so run it with --timeout-graceful-shutdown to bound how long open streams can
+# delay shutdown (and the final stats flush).
+broadcaster = Broadcaster(SSE_QUEUE_SIZE)
+
+def changed_fields(before: Optional[dict], after: dict) -> List[str]:
+    """Model fields that differ between the stored document and its replacement."""
+    before = before or {}
+    return [k for k, v in after.items() if k != SCHEMA_VERSION_FIELD and before.get(k) != v]
+
+def notify(kind: str, action: str, doc_id: Optional[str] = None, **fields):
+    """Push a change event, e.g. notify("blog", "updated", bid, likes=3). Call after the write has committed."""
+    if kind in ("blog", "projects") and action in ("created", "deleted"):
+        known_targets.invalidate()
+    broadcaster.publish({"type": kind, "action": action, "id": doc_id, **fields})
+
+@api_router.get("/stream")
+async def stream_updates(request: Request):
+    q = broadcaster.subscribe()
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(q.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event is Broadcaster.RESET:
+                    return
+        finally:
+            broadcaster.unsubscribe(q)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
 
 # ===================== Profile =====================
 @api_router.get("/profile", response_model=Profile)
 async def get_profile():
-    doc = await collection("profile").find_one({}, {"_id": 0})
+    doc = await storage.profile.get()
     if not doc:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Profile not found")
-    return Profile(**doc)
+    # Returning a Response skips the second validation pass through response_model
+    return JSONResponse((await read_docs(Profile, [doc], storage.profile.upgrade))[0])
 
 @api_router.put("/profile", response_model=Profile)
 async def upsert_profile(payload: ProfileUpsert):
-    existing = await collection("profile").find_one({}, {"_id": 0})
+    existing = await storage.profile.get()
     pid = existing.get("id") if existing else str(uuid.uuid4())
-    data = Profile(id=pid, **payload.model_dump()).model_dump()
-    await collection("profile").update_one({}, {"$set": data}, upsert=True)
+    data = stamped(Profile(id=pid, **payload.model_dump()).model_dump())
+    await storage.profile.upsert(data)
+    notify("profile", "updated", pid)
     return Profile(**data)
 
 # ===================== Projects =====================
 @api_router.get("/projects", response_model=List[Project])
 async def list_projects():
-    docs = await collection("projects").find({}, {"_id": 0}).to_list(1000)
-    return [Project(**d) for d in docs]
+    docs = await storage.projects.list()
+    return JSONResponse(await read_docs(Project, docs, lambda d: storage.projects.upgrade(d["id"], d)))
 
 @api_router.post("/projects", response_model=Project)
 async def create_project(p: Project):
-    data = p.model_dump()
-    await collection("projects").insert_one(data)
+    data = stamped(p.model_dump())
+    await storage.projects.insert(data)
+    notify("projects", "created", p.id)
     return p
 
 @api_router.put("/projects/{pid}", response_model=Project)
 async def update_project(pid: str, p: Project):
-    data = p.model_dump()
+    data = stamped(p.model_dump())
     data["id"] = pid
-    await collection("projects").update_one({"id": pid}, {"$set": data}, upsert=False)
+    await storage.projects.update(pid, data)
+    notify("projects", "updated", pid)
     return Project(**data)
 
 @api_router.delete("/projects/{pid}")
 async def delete_project(pid: str):
-    await collection("projects").delete_one({"id": pid})
+    await storage.projects.delete(pid)
+    notify("projects", "deleted", pid)
     return {"ok": True}
 
 # ===================== Skills =====================
 @api_router.get("/skills", response_model=List[SkillGroup])
 async def get_skills():
-    docs = await collection("skills").find({}, {"_id": 0}).to_list(1000)
-    return [SkillGroup(**d) for d in docs]
+    docs = await storage.skills.list()
+    # Skills are replaced as a whole, so stale groups are only validated until the next save
+    return JSONResponse(await read_docs(SkillGroup, docs))
 
 @api_router.put("/skills", response_model=List[SkillGroup])
 async def put_skills(payload: List[SkillGroup]):
-    await collection("skills").delete_many({})
-    docs = [p.model_dump() for p in payload]
-    if docs:
-        await collection("skills").insert_many(docs)
+    docs = [stamped(p.model_dump()) for p in payload]
+    await replace_skills(docs)
     return [SkillGroup(**d) for d in docs]
 
 # ===================== Blog =====================
 @api_router.get("/blog", response_model=List[BlogPost])
 async def list_blog():
-    docs = await collection("blog").find({}, {"_id": 0}).sort("date", -1).to_list(1000)
-    return [BlogPost(**d) for d in docs]
+    docs = await storage.blog.list()
+    return JSONResponse(await read_docs(BlogPost, docs, lambda d: storage.blog.upgrade(d["id"], d)))
 
 @api_router.post("/blog", response_model=BlogPost)
 async def create_blog(post: BlogPost):
-    data = post.model_dump()
-    await collection("blog").insert_one(data)
+    data = stamped(post.model_dump())
+    await storage.blog.insert(data)
+    notify("blog", "created", post.id, likes=post.likes)
     return post
 
 @api_router.get("/blog/{bid}", response_model=BlogPost)
 async def get_blog(bid: str):
-    doc = await collection("blog").find_one({"id": bid}, {"_id": 0})
+    doc = await storage.blog.get(bid)
     if not doc:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return BlogPost(**doc)
+    return JSONResponse((await read_docs(BlogPost, [doc], lambda d: storage.blog.upgrade(bid, d)))[0])
 
 @api_router.put("/blog/{bid}", response_model=BlogPost)
 async def update_blog(bid: str, post: BlogPost):
-    data = post.model_dump()
+    data = stamped(post.model_dump())
     data["id"] = bid
-    await collection("blog").update_one({"id": bid}, {"$set": data}, upsert=False)
+    before = await storage.blog.get(bid)
+    await storage.blog.update(bid, data)
+    # Likes are saved through this route too; `changed` lets clients skip refetching for them
+    notify("blog", "updated", bid, likes=data["likes"], changed=changed_fields(before, data))
     return BlogPost(**data)
 
 @api_router.delete("/blog/{bid}")
 async def delete_blog(bid: str):
-    await collection("blog").delete_one({"id": bid})
+    await storage.blog.delete(bid)
+    notify("blog", "deleted", bid)
     return {"ok": True}
 
 # ===================== Contact =====================
@@ -260,10 +390,150 @@ async def create_contact(msg: ContactCreate):
     doc = ContactMessage(name=msg.name, email=msg.email, message=msg.message)
     to_store = doc.model_dump()
     to_store['created_at'] = to_store['created_at'].isoformat()
-    await collection("contact_messages").insert_one(to_store)
+    await storage.contact.insert(to_store)
     email_result = await send_contact_email(msg.name, msg.email, msg.message)
     return {"ok": True, "email": email_result}
 
+# ===================== Analytics =====================
+import time
+from array import array
+from datetime import timedelta
+from typing import Dict, Literal, Set, Tuple
+from fastapi import HTTPException, Query, Request, Response
+
+STATS_FLUSH_SECONDS = float(os.environ.get("STATS_FLUSH_SECONDS", "30"))
+# A full beacon is at most 50 events of ~100 bytes; anything larger is rejected before parsing
+EVENTS_MAX_BYTES = 8 * 1024
+# How long the set of known post/project ids is trusted before it is reloaded
+STATS_TARGETS_TTL_SECONDS = float(os.environ.get("STATS_TARGETS_TTL_SECONDS", "300"))
+# Distinct target ids held between flushes; events for new targets beyond this are dropped
+STATS_MAX_TARGETS = int(os.environ.get("STATS_MAX_TARGETS", "50000"))
+
+class EventCounters:
+    """Counts since the last flush. Target ids are interned to dense indices once per flush window,
+    and each (kind, hour) bucket is an array("Q") indexed by target, so counting an event is an
+    array increment rather than a per-(kind, target, hour) dict entry."""
+
+    def __init__(self):
+        self.targets: Dict[str, int] = {}
+        self.target_ids: List[str] = []
+        self.buckets: Dict[Tuple[str, str], array] = {}
+
+    def add(self, kind: str, target_id: str, hour: str, n: int = 1) -> bool:
+        t = self.targets.get(target_id)
+        if t is None:
+            if len(self.target_ids) >= STATS_MAX_TARGETS:
+                return False
+            t = self.targets[target_id] = len(self.target_ids)
+            self.target_ids.append(target_id)
+        counts = self.buckets.get((kind, hour))
+        if counts is None:
+            counts = self.buckets[(kind, hour)] = array("Q")
+        if t >= len(counts):
+            counts.extend([0] * (len(self.target_ids) - len(counts)))
+        counts[t] += n
+        return True
+
+    def drain(self):
+        rows = [
+            (kind, self.target_ids[t], hour, n)
+            for (kind, hour), counts in self.buckets.items()
+            for t, n in enumerate(counts) if n
+        ]
+        self.targets, self.target_ids, self.buckets = {}, [], {}
+        return rows
+
+event_counters = EventCounters()
+
+class KnownTargets:
+    """Ids of existing posts and projects, so beacons for anything else are dropped instead of
+    taking counter slots and `stats` rows. Reloaded after a post or project is created or deleted."""
+
+    KINDS = {"blog_view": "blog", "project_click": "projects"}
+
+    def __init__(self):
+        self.ids: Dict[str, Set[str]] = {}
+        self.loaded_at: Optional[float] = None
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def get(self, kind: str) -> Set[str]:
+        now = time.monotonic()
+        if self.loaded_at is None or now - self.loaded_at > STATS_TARGETS_TTL_SECONDS:
+            self.ids = {
+                k: {d["id"] for d in await getattr(storage, coll).list()} for k, coll in self.KINDS.items()
+            }
+            self.loaded_at = now
+        return self.ids[kind]
+
+known_targets = KnownTargets()
+
+class EventIn(BaseModel):
+    kind: Literal["blog_view", "project_click"]
+    id: str = Field(min_length=1, max_length=64)
+
+class StatCount(BaseModel):
+    id: str
+    count: int
+
+def hour_bucket(value: datetime) -> str:
+    return value.replace(minute=0, second=0, microsecond=0).isoformat()
+
+async def read_body(request: Request, limit: int) -> bytes:
+    too_large = HTTPException(status_code=413, detail=f"Body larger than {limit} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise too_large
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return body
+
+@api_router.post("/events", status_code=204)
+async def track_events(request: Request):
+    # navigator.sendBeacon posts text/plain (no CORS preflight), so the body is parsed here
+    body = await read_body(request, EVENTS_MAX_BYTES)
+    try:
+        payload = json.loads(body or b"null")
+        events = [EventIn(**e) for e in (payload if isinstance(payload, list) else [payload])[:50]]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid event: {e}")
+    hour = hour_bucket(datetime.now(timezone.utc))
+    for e in events:
+        if e.id in await known_targets.get(e.kind):
+            event_counters.add(e.kind, e.id, hour)
+    return Response(status_code=204)
+
+@api_router.get("/stats/top", response_model=List[StatCount])
+async def top_stats(
+    kind: Literal["blog_view", "project_click"] = "blog_view",
+    hours: int = Query(24 * 7, ge=1, le=24 * 366),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Top targets by count over the last `hours` (current hour included), as of the last flush."""
+    since = hour_bucket(datetime.now(timezone.utc) - timedelta(hours=hours - 1))
+    return await storage.stats.top(kind, since, limit)
+
+async def flush_event_counters():
+    rows = event_counters.drain()
+    if not rows:
+        return
+    try:
+        await storage.stats.increment(rows)
+    except Exception as e:
+        # Keep the counts for the next flush instead of losing them
+        for kind, target, hour, n in rows:
+            event_counters.add(kind, target, hour, n)
+        logger.error(f"Stats flush failed: {e}")
+
+async def stats_flush_loop():
+    while True:
+        await asyncio.sleep(STATS_FLUSH_SECONDS)
+        await flush_event_counters()
+
 
 # ===================== Admin Minimal (Token-based) =====================
 from fastapi import Header, HTTPException, Depends
@@ -279,48 +549,250 @@ async def require_admin(x_admin_token: str = Header(None)):
 
 @admin_router.post("/projects", dependencies=[Depends(require_admin)], response_model=Project)
 async def admin_create_project(p: Project):
-    data = p.model_dump()
-    await collection("projects").insert_one(data)
+    data = stamped(p.model_dump())
+    await storage.projects.insert(data)
+    notify("projects", "created", p.id)
     return p
 
 @admin_router.put("/projects/{pid}", dependencies=[Depends(require_admin)], response_model=Project)
 async def admin_update_project(pid: str, p: Project):
-    data = p.model_dump()
+    data = stamped(p.model_dump())
     data["id"] = pid
-    await collection("projects").update_one({"id": pid}, {"$set": data}, upsert=False)
+    await storage.projects.update(pid, data)
+    notify("projects", "updated", pid)
     return Project(**data)
 
 @admin_router.delete("/projects/{pid}", dependencies=[Depends(require_admin)])
 async def admin_delete_project(pid: str):
-    await collection("projects").delete_one({"id": pid})
+    await storage.projects.delete(pid)
+    notify("projects", "deleted", pid)
     return {"ok": True}
 
 @admin_router.put("/skills", dependencies=[Depends(require_admin)], response_model=List[SkillGroup])
 async def admin_put_skills(payload: List[SkillGroup]):
-    await collection("skills").delete_many({})
-    docs = [p.model_dump() for p in payload]
-    if docs:
-        await collection("skills").insert_many(docs)
+    docs = [stamped(p.model_dump()) for p in payload]
+    await replace_skills(docs)
     return [SkillGroup(**d) for d in docs]
 
 @admin_router.post("/blog", dependencies=[Depends(require_admin)], response_model=BlogPost)
 async def admin_create_blog(post: BlogPost):
-    data = post.model_dump()
-    await collection("blog").insert_one(data)
+    data = stamped(post.model_dump())
+    await storage.blog.insert(data)
+    notify("blog", "created", post.id, likes=post.likes)
     return post
 
 @admin_router.put("/blog/{bid}", dependencies=[Depends(require_admin)], response_model=BlogPost)
 async def admin_update_blog(bid: str, post: BlogPost):
-    data = post.model_dump()
+    data = stamped(post.model_dump())
     data["id"] = bid
-    await collection("blog").update_one({"id": bid}, {"$set": data}, upsert=False)
+    before = await storage.blog.get(bid)
+    await storage.blog.update(bid, data)
+    # Likes are saved through this route too; `changed` lets clients skip refetching for them
+    notify("blog", "updated", bid, likes=data["likes"], changed=changed_fields(before, data))
     return BlogPost(**data)
 
 @admin_router.delete("/blog/{bid}", dependencies=[Depends(require_admin)])
 async def admin_delete_blog(bid: str):
-    await collection("blog").delete_one({"id": bid})
+    await storage.blog.delete(bid)
+    notify("blog", "deleted", bid)
     return {"ok": True}
 
+# ===================== Admin Batch =====================
+from typing import Any, Literal
+from pydantic import TypeAdapter, ValidationError
+from storage import BatchWrite
+
+class BatchOp(BaseModel):
+    collection: Literal["profile", "projects", "skills", "blog"]
+    action: Literal["create", "update", "delete", "replace", "upsert"]
+    id: Optional[str] = None
+    data: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    ops: List[BatchOp]
+
+# (collection, action) -> model used to validate `data` before anything is written
+BATCH_ACTIONS = {
+    ("projects", "create"): Project,
+    ("projects", "update"): Project,
+    ("projects", "delete"): None,
+    ("blog", "create"): BlogPost,
+    ("blog", "update"): BlogPost,
+    ("blog", "delete"): None,
+    ("skills", "replace"): SkillGroup,
+    ("profile", "upsert"): ProfileUpsert,
+}
+
+class BatchDataError(ValueError):
+    """`data` has the wrong shape for the op's action."""
+
+# Batch action -> change event action
+BATCH_EVENTS = {"create": "created", "update": "updated", "delete": "deleted", "replace": "replaced", "upsert": "updated"}
+
+def plan_batch_op(op: BatchOp) -> BatchWrite:
+    """Validate one op and turn it into a storage write."""
+    key = (op.collection, op.action)
+    if key not in BATCH_ACTIONS:
+        raise ValueError(f"action '{op.action}' is not supported on '{op.collection}'")
+    model = BATCH_ACTIONS[key]
+    if op.action == "replace":
+        if not isinstance(op.data, list) or not all(isinstance(g, dict) for g in op.data):
+            raise BatchDataError("must be a list of objects")
+    elif op.action != "delete" and not isinstance(op.data, dict):
+        raise BatchDataError("must be an object")
+
+    if op.action == "delete":
+        if not op.id:
+            raise ValueError("id is required")
+        return BatchWrite(op.collection, op.action, op.id)
+    if op.action == "replace":
+        # Validated as one list so error locations include the group index
+        groups = [stamped(g.model_dump()) for g in TypeAdapter(List[model]).validate_python(op.data)]
+        return BatchWrite(op.collection, op.action, data=groups)
+    if op.action == "upsert":
+        # The id is only used if no profile exists yet
+        data = stamped(Profile(**model.model_validate(op.data).model_dump()).model_dump())
+        return BatchWrite(op.collection, op.action, data=data)
+
+    data = stamped(model.model_validate(op.data).model_dump())
+    if op.action == "update":
+        if not op.id:
+            raise ValueError("id is required")
+        data["id"] = op.id
+    return BatchWrite(op.collection, op.action, data["id"], data)
+
+async def run_batch(ops: List[BatchOp]):
+    """Execute ops in order, atomically when the storage backend supports transactions."""
+    writes = []
+    for i, op in enumerate(ops):
+        try:
+            writes.append(plan_batch_op(op))
+        except ValidationError as e:
+            # Same shape as FastAPI's request validation errors, without echoing the input back
+            raise HTTPException(status_code=422, detail=[
+                {"loc": ["body", "ops", i, "data", *err["loc"]], "msg": err["msg"], "type": err["type"]}
+                for err in e.errors(include_url=False)
+            ])
+        except BatchDataError as e:
+            raise HTTPException(status_code=422, detail=f"ops[{i}].data {e}")
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"ops[{i}]: {e}")
+
+    outcome = await storage.apply_batch(writes)
+    results = [
+        {"index": i, "collection": w.collection, "action": w.action,
+         "id": w.id if w.collection in ("projects", "blog") else None, "ok": False}
+        for i, w in enumerate(writes)
+    ]
+    if outcome.failed_at is None:
+        for r in results:
+            r["ok"] = True
+    else:
+        # Inside a transaction nothing was applied; ordered bulk writes applied everything before the failure.
+        applied = 0 if outcome.transactional else outcome.failed_at
+        for r in results[:applied]:
+            r["ok"] = True
+        for r in results[outcome.failed_at:outcome.failed_at + outcome.unknown]:
+            r["ok"] = None
+        if outcome.failed_at < len(results):
+            results[outcome.failed_at]["error"] = outcome.error
+        logger.error(f"Admin batch failed at op {outcome.failed_at}: {outcome.error}")
+    for w, r in zip(writes, results):
+        if r["ok"]:
+            fields = {"likes": w.data["likes"]} if w.collection == "blog" and w.action != "delete" else {}
+            notify(w.collection, BATCH_EVENTS[w.action], r["id"], **fields)
+    return {"ok": outcome.failed_at is None, "transactional": outcome.transactional, "results": results}
+
+@admin_router.post("/batch", dependencies=[Depends(require_admin)])
+async def admin_batch(payload: BatchRequest):
+    return await run_batch(payload.ops)
+
+async def replace_skills(docs: List[dict]):
+    # Delete + insert go through the batch executor so readers never see an empty list
+    # when a transaction is available.
+    result = await run_batch([BatchOp(collection="skills", action="replace", data=docs)])
+    if not result["ok"]:
+        raise HTTPException(status_code=500, detail=result["results"][0].get("error", "Write failed"))
+
+# ===================== Admin Contact Inbox =====================
+import base64
+import csv
+import io
+from fastapi import Query
+
+CONTACT_FIELDS = ["id", "name", "email", "message", "created_at"]
+
+def csv_safe(value):
+    # Messages come from anonymous visitors: keep spreadsheets from evaluating them as formulas
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+class ContactPage(BaseModel):
+    items: List[ContactMessage]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(doc: dict) -> str:
+    return base64.urlsafe_b64encode(f"{doc['created_at']}|{doc['id']}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, mid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, mid
+
+def iso_utc(value: datetime) -> str:
+    # created_at is stored as an aware UTC ISO string, so bounds must use the same format to compare correctly
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+@admin_router.get("/contact", dependencies=[Depends(require_admin)], response_model=ContactPage)
+async def admin_list_contact(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    email: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Newest first, keyset-paginated on (created_at, id) so deep pages cost the same as the first."""
+    before = decode_cursor(cursor) if cursor else None
+    docs = await storage.contact.page(
+        email, since and iso_utc(since), until and iso_utc(until), before, limit + 1
+    )
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return ContactPage(items=[ContactMessage(**d) for d in docs[:limit]], next_cursor=next_cursor)
+
+@admin_router.get("/contact/export", dependencies=[Depends(require_admin)])
+async def admin_export_contact(
+    format: Literal["csv", "ndjson"] = "csv",
+    email: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Stream matching messages oldest first straight from the cursor, one row at a time."""
+    cursor = storage.contact.scan(email, since and iso_utc(since), until and iso_utc(until))
+
+    async def rows():
+        if format == "csv":
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=CONTACT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            yield buf.getvalue()
+            async for doc in cursor:
+                buf.seek(0)
+                buf.truncate(0)
+                writer.writerow({k: csv_safe(v) for k, v in doc.items()})
+                yield buf.getvalue()
+        else:
+            async for doc in cursor:
+                yield json.dumps({k: doc.get(k) for k in CONTACT_FIELDS}, default=str) + "\n"
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="contact_messages.{format}"'}
+    return StreamingResponse(rows(), media_type=media_type, headers=headers)
+
 # Mount admin
 app.include_router(admin_router)
 
@@ -343,6 +815,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def init_storage():
+    await storage.init()
+    broadcaster.open()
+    app.state.stats_flusher = asyncio.create_task(stats_flush_loop())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    broadcaster.close()
+    app.state.stats_flusher.cancel()
+    await flush_event_counters()
+    storage.close()
\ No newline at end of file
@@ -0,0 +1,522 @@
+"""Storage backends for the portfolio API.
+
+Handlers in server.py only talk to the repositories defined here and exchange plain dicts
+(the same shape that used to go into Mongo). Two engines are available:
+
+- MongoStorage: Motor/MongoDB, the production default.
+- SqliteStorage: embedded SQLite in WAL mode; SQLITE_PATH=":memory:" gives an in-process store
+  for tests, benchmarks and single-node deployments without a database server. It supports a
+  single server worker (one process) per database file.
+"""
+import asyncio
+import json
+import sqlite3
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Protocol, Tuple
+
+# Documents written through the validated API path carry the model schema version under this key
+SCHEMA_VERSION_FIELD = "_v"
+
+
+# ===================== Interfaces =====================
+class ProfileRepo(Protocol):
+    async def get(self) -> Optional[dict]: ...
+    # Sets the given fields; an already stored id is kept.
+    async def upsert(self, data: dict) -> None: ...
+    # Writes a migrated copy unless the stored profile already has data's schema version.
+    async def upgrade(self, data: dict) -> None: ...
+
+class ProjectRepo(Protocol):
+    async def list(self) -> List[dict]: ...
+    async def get(self, doc_id: str) -> Optional[dict]: ...
+    async def insert(self, doc: dict) -> None: ...
+    async def update(self, doc_id: str, data: dict) -> None: ...
+    async def delete(self, doc_id: str) -> None: ...
+    async def upgrade(self, doc_id: str, data: dict) -> None: ...
+
+class BlogRepo(ProjectRepo, Protocol):
+    # Same operations as projects; list() is ordered by date, newest first.
+    pass
+
+class SkillRepo(Protocol):
+    # Skills are only written as a whole, through apply_batch's "replace" so it stays atomic.
+    async def list(self) -> List[dict]: ...
+
+class ContactRepo(Protocol):
+    async def insert(self, doc: dict) -> None: ...
+    # Newest first, strictly after the (created_at, id) keyset `before` when given.
+    async def page(self, email: Optional[str], since: Optional[str], until: Optional[str],
+                   before: Optional[Tuple[str, str]], limit: int) -> List[dict]: ...
+    # Oldest first, without holding the whole result in memory.
+    def scan(self, email: Optional[str], since: Optional[str], until: Optional[str]) -> AsyncIterator[dict]: ...
+
+class StatusRepo(Protocol):
+    async def list(self) -> List[dict]: ...
+    async def insert(self, doc: dict) -> None: ...
+
+class StatsRepo(Protocol):
+    # rows are (kind, target_id, hour, count); counts are added to what is already stored.
+    async def increment(self, rows: List[Tuple[str, str, str, int]]) -> None: ...
+    # [{"id", "count"}] summed over hours >= since, highest first.
+    async def top(self, kind: str, since: str, limit: int) -> List[dict]: ...
+
+class BatchWrite(NamedTuple):
+    """One validated admin write. `action` is create/update/delete (projects, blog),
+    replace (skills, data is the full list) or upsert (profile)."""
+    collection: str
+    action: str
+    id: Optional[str] = None
+    data: Any = None
+
+class BatchOutcome(NamedTuple):
+    transactional: bool
+    failed_at: Optional[int] = None
+    error: Optional[str] = None
+    # Writes from failed_at on that may or may not have been applied (connection lost mid-write)
+    unknown: int = 0
+
+
+# ===================== MongoDB =====================
+class MongoProfileRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def get(self):
+        return await self.coll.find_one({}, {"_id": 0})
+
+    async def upsert(self, data):
+        fields = {k: v for k, v in data.items() if k != "id"}
+        await self.coll.update_one({}, {"$set": fields, "$setOnInsert": {"id": data["id"]}}, upsert=True)
+
+    async def upgrade(self, data):
+        # Conditional so a concurrent save of a newer document is never overwritten
+        version = data[SCHEMA_VERSION_FIELD]
+        await self.coll.update_one({SCHEMA_VERSION_FIELD: {"$ne": version}}, {"$set": data})
+
+class MongoDocumentRepo:
+    def __init__(self, coll, sort=None):
+        self.coll = coll
+        self.sort = sort
+
+    async def list(self):
+        cursor = self.coll.find({}, {"_id": 0})
+        if self.sort:
+            cursor = cursor.sort(*self.sort)
+        return await cursor.to_list(1000)
+
+    async def get(self, doc_id):
+        return await self.coll.find_one({"id": doc_id}, {"_id": 0})
+
+    async def insert(self, doc):
+        # insert_one adds `_id` to the dict it is given
+        await self.coll.insert_one(dict(doc))
+
+    async def update(self, doc_id, data):
+        await self.coll.update_one({"id": doc_id}, {"$set": data}, upsert=False)
+
+    async def delete(self, doc_id):
+        await self.coll.delete_one({"id": doc_id})
+
+    async def upgrade(self, doc_id, data):
+        version = data[SCHEMA_VERSION_FIELD]
+        await self.coll.update_one({"id": doc_id, SCHEMA_VERSION_FIELD: {"$ne": version}}, {"$set": data})
+
+def contact_query(email, since, until, before=None) -> dict:
+    query = {}
+    if email:
+        query["email"] = email
+    if since or until:
+        query["created_at"] = {}
+        if since:
+            query["created_at"]["$gte"] = since
+        if until:
+            query["created_at"]["$lt"] = until
+    if before:
+        keyset = {"$or": [
+            {"created_at": {"$lt": before[0]}},
+            {"created_at": before[0], "id": {"$lt": before[1]}},
+        ]}
+        query = {"$and": [query, keyset]} if query else keyset
+    return query
+
+class MongoContactRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def insert(self, doc):
+        await self.coll.insert_one(dict(doc))
+
+    async def page(self, email, since, until, before, limit):
+        return await (
+            self.coll.find(contact_query(email, since, until, before), {"_id": 0})
+            .sort([("created_at", -1), ("id", -1)])
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    async def scan(self, email, since, until):
+        cursor = (
+            self.coll.find(contact_query(email, since, until), {"_id": 0})
+            .sort([("created_at", 1), ("id", 1)])
+            .batch_size(500)
+        )
+        async for doc in cursor:
+            yield doc
+
+class MongoStatsRepo:
+    def __init__(self, coll):
+        self.coll = coll
+
+    async def increment(self, rows):
+        from pymongo import UpdateOne
+        if rows:
+            await self.coll.bulk_write([
+                UpdateOne({"kind": kind, "target_id": target, "hour": hour}, {"$inc": {"count": n}}, upsert=True)
+                for kind, target, hour, n in rows
+            ], ordered=False)
+
+    async def top(self, kind, since, limit):
+        return await self.coll.aggregate([
+            {"$match": {"kind": kind, "hour": {"$gte": since}}},
+            {"$group": {"_id": "$target_id", "count": {"$sum": "$count"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "id": "$_id", "count": 1}},
+        ]).to_list(limit)
+
+class MongoStorage:
+    def __init__(self, url: str, db_name: str):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        self.client = AsyncIOMotorClient(url)
+        self.db = self.client[db_name]
+        self.profile = MongoProfileRepo(self.db["profile"])
+        self.projects = MongoDocumentRepo(self.db["projects"])
+        self.blog = MongoDocumentRepo(self.db["blog"], sort=("date", -1))
+        self.skills = MongoDocumentRepo(self.db["skills"])
+        self.contact = MongoContactRepo(self.db["contact_messages"])
+        self.status = MongoDocumentRepo(self.db["status_checks"])
+        self.stats = MongoStatsRepo(self.db["stats"])
+        self._supports_transactions: Optional[bool] = None
+
+    async def init(self):
+        # Inbox listing/export sort on (created_at, id) and filter by email within a date range
+        await self.db["contact_messages"].create_index([("created_at", -1), ("id", -1)])
+        await self.db["contact_messages"].create_index([("email", 1), ("created_at", -1), ("id", -1)])
+        # One counter document per (kind, target, hour); top-N scans a kind over a recent hour range
+        await self.db["stats"].create_index([("kind", 1), ("target_id", 1), ("hour", 1)], unique=True)
+        await self.db["stats"].create_index([("kind", 1), ("hour", -1)])
+
+    def close(self):
+        self.client.close()
+
+    async def supports_transactions(self) -> bool:
+        """Transactions need a replica set or a sharded cluster; cache the answer after the first probe."""
+        from pymongo.errors import PyMongoError
+        if self._supports_transactions is None:
+            try:
+                hello = await self.client.admin.command("hello")
+                self._supports_transactions = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+            except PyMongoError:
+                self._supports_transactions = False
+        return self._supports_transactions
+
+    @staticmethod
+    def write_requests(w: BatchWrite):
+        from pymongo import InsertOne, UpdateOne, DeleteOne, DeleteMany
+        if w.action == "delete":
+            return [DeleteOne({"id": w.id})]
+        if w.action == "replace":
+            return [DeleteMany({})] + [InsertOne(dict(g)) for g in w.data]
+        if w.action == "upsert":
+            fields = {k: v for k, v in w.data.items() if k != "id"}
+            return [UpdateOne({}, {"$set": fields, "$setOnInsert": {"id": w.data["id"]}}, upsert=True)]
+        if w.action == "update":
+            return [UpdateOne({"id": w.id}, {"$set": w.data}, upsert=False)]
+        return [InsertOne(dict(w.data))]
+
+    async def apply_batch(self, writes: List[BatchWrite]) -> BatchOutcome:
+        """One ordered bulk_write per run of same-collection writes, inside a single transaction
+        when the deployment supports it."""
+        from pymongo.errors import BulkWriteError, PyMongoError
+
+        # Group consecutive writes on the same collection; `owners` maps each request back to its write.
+        groups = []
+        for i, w in enumerate(writes):
+            requests = self.write_requests(w)
+            if not groups or groups[-1]["collection"] != w.collection:
+                groups.append({"collection": w.collection, "requests": [], "owners": []})
+            groups[-1]["requests"].extend(requests)
+            groups[-1]["owners"].extend([i] * len(requests))
+
+        transactional = await self.supports_transactions()
+        if not groups:
+            return BatchOutcome(transactional)
+        state = {"group": 0}
+
+        async def write_all(session=None):
+            for n, group in enumerate(groups):
+                state["group"] = n
+                await self.db[group["collection"]].bulk_write(group["requests"], ordered=True, session=session)
+
+        try:
+            if transactional:
+                async with await self.client.start_session() as s:
+                    await s.with_transaction(write_all)
+            else:
+                await write_all()
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors") or [{}]
+            failed_at = groups[state["group"]]["owners"][write_errors[0].get("index", 0)]
+            return BatchOutcome(transactional, failed_at, write_errors[0].get("errmsg", str(e)))
+        except PyMongoError as e:
+            owners = groups[state["group"]]["owners"]
+            if transactional:
+                return BatchOutcome(transactional, owners[0], str(e))
+            # Without a transaction any prefix of the failed bulk write may already be applied
+            return BatchOutcome(transactional, owners[0], str(e), unknown=owners[-1] - owners[0] + 1)
+        return BatchOutcome(transactional)
+
+
+# ===================== SQLite =====================
+# Each collection is a table of JSON documents plus the few columns that are filtered or sorted on.
+# `seq` keeps insertion order, matching Mongo's natural order for unsorted lists.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (k INTEGER PRIMARY KEY CHECK (k = 1), doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS projects (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS projects_id ON projects (id);
+CREATE TABLE IF NOT EXISTS blog (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, date TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS blog_id ON blog (id);
+CREATE INDEX IF NOT EXISTS blog_date ON blog (date DESC);
+CREATE TABLE IF NOT EXISTS skills (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS contact_messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, email TEXT, created_at TEXT, doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contact_created ON contact_messages (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS contact_email_created ON contact_messages (email, created_at DESC, id DESC);
+CREATE TABLE IF NOT EXISTS status_checks (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stats (
+    kind TEXT NOT NULL, target_id TEXT NOT NULL, hour TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (kind, target_id, hour)
+);
+CREATE INDEX IF NOT EXISTS stats_kind_hour ON stats (kind, hour);
+"""
+
+class SqliteProfileRepo:
+    def __init__(self, db: "SqliteStorage"):
+        self.db = db
+
+    async def get(self):
+        row = self.db.conn.execute("SELECT doc FROM profile WHERE k = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_sync(self, data):
+        row = self.db.conn.execute("SELECT doc FROM profile WHERE k = 1").fetchone()
+        doc = json.loads(row[0]) if row else {"id": data["id"]}
+        doc.update({k: v for k, v in data.items() if k != "id"})
+        self.db.conn.execute("INSERT OR REPLACE INTO profile (k, doc) VALUES (1, ?)", (json.dumps(doc),))
+
+    async def upsert(self, data):
+        with self.db.write():
+            self.upsert_sync(data)
+
+    async def upgrade(self, data):
+        with self.db.write():
+            row = self.db.conn.execute("SELECT doc FROM profile WHERE k = 1").fetchone()
+            if row and json.loads(row[0]).get(SCHEMA_VERSION_FIELD) != data[SCHEMA_VERSION_FIELD]:
+                self.upsert_sync(data)
+
+class SqliteDocumentRepo:
+    def __init__(self, db: "SqliteStorage", table: str, columns: Tuple[str, ...] = (), order: str = "seq"):
+        self.db = db
+        self.table = table
+        # Document fields mirrored into their own (indexed) columns
+        self.columns = ("id",) + columns
+        self.order = order
+
+    async def list(self):
+        rows = self.db.conn.execute(f"SELECT doc FROM {self.table} ORDER BY {self.order} LIMIT 1000")
+        return [json.loads(r[0]) for r in rows]
+
+    async def get(self, doc_id):
+        row = self.db.conn.execute(f"SELECT doc FROM {self.table} WHERE id = ? ORDER BY seq LIMIT 1", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert_sync(self, doc):
+        cols = ", ".join(self.columns + ("doc",))
+        marks = ", ".join("?" * (len(self.columns) + 1))
+        values = [doc.get(c) for c in self.columns] + [json.dumps(doc)]
+        self.db.conn.execute(f"INSERT INTO {self.table} ({cols}) VALUES ({marks})", values)
+
+    def update_sync(self, doc_id, data, only_older=False):
+        row = self.db.conn.execute(f"SELECT seq, doc FROM {self.table} WHERE id = ? ORDER BY seq LIMIT 1", (doc_id,)).fetchone()
+        if not row:
+            return
+        doc = json.loads(row[1])
+        if only_older and doc.get(SCHEMA_VERSION_FIELD) == data[SCHEMA_VERSION_FIELD]:
+            return
+        doc.update(data)
+        sets = ", ".join(f"{c} = ?" for c in self.columns + ("doc",))
+        values = [doc.get(c) for c in self.columns] + [json.dumps(doc), row[0]]
+        self.db.conn.execute(f"UPDATE {self.table} SET {sets} WHERE seq = ?", values)
+
+    def delete_sync(self, doc_id):
+        self.db.conn.execute(
+            f"DELETE FROM {self.table} WHERE seq = (SELECT seq FROM {self.table} WHERE id = ? ORDER BY seq LIMIT 1)",
+            (doc_id,),
+        )
+
+    def replace_sync(self, docs):
+        self.db.conn.execute(f"DELETE FROM {self.table}")
+        for doc in docs:
+            self.insert_sync(doc)
+
+    async def insert(self, doc):
+        with self.db.write():
+            self.insert_sync(doc)
+
+    async def update(self, doc_id, data):
+        with self.db.write():
+            self.update_sync(doc_id, data)
+
+    async def delete(self, doc_id):
+        with self.db.write():
+            self.delete_sync(doc_id)
+
+    async def upgrade(self, doc_id, data):
+        with self.db.write():
+            self.update_sync(doc_id, data, only_older=True)
+
+def contact_where(email, since, until, before=None) -> Tuple[str, list]:
+    clauses, params = [], []
+    if email:
+        clauses.append("email = ?")
+        params.append(email)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_at < ?")
+        params.append(until)
+    if before:
+        clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params.extend([before[0], before[0], before[1]])
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+class SqliteContactRepo(SqliteDocumentRepo):
+    def __init__(self, db: "SqliteStorage"):
+        super().__init__(db, "contact_messages", columns=("email", "created_at"))
+
+    async def page(self, email, since, until, before, limit):
+        where, params = contact_where(email, since, until, before)
+        rows = self.db.conn.execute(
+            f"SELECT doc FROM contact_messages{where} ORDER BY created_at DESC, id DESC LIMIT ?", params + [limit]
+        )
+        return [json.loads(r[0]) for r in rows]
+
+    async def scan(self, email, since, until):
+        # Keyset chunks instead of one long-lived cursor, so writes are never blocked by an export
+        after = None
+        while True:
+            where, params = contact_where(email, since, until)
+            if after:
+                where += (" AND " if where else " WHERE ") + "(created_at > ? OR (created_at = ? AND id > ?))"
+                params += [after[0], after[0], after[1]]
+            rows = self.db.conn.execute(
+                f"SELECT created_at, id, doc FROM contact_messages{where} ORDER BY created_at, id LIMIT 500", params
+            ).fetchall()
+            for row in rows:
+                yield json.loads(row[2])
+            if len(rows) < 500:
+                return
+            after = (rows[-1][0], rows[-1][1])
+            await asyncio.sleep(0)
+
+class SqliteStatsRepo:
+    def __init__(self, db: "SqliteStorage"):
+        self.db = db
+
+    async def increment(self, rows):
+        with self.db.write():
+            self.db.conn.executemany(
+                "INSERT INTO stats (kind, target_id, hour, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (kind, target_id, hour) DO UPDATE SET count = count + excluded.count",
+                rows,
+            )
+
+    async def top(self, kind, since, limit):
+        rows = self.db.conn.execute(
+            "SELECT target_id, SUM(count) AS total FROM stats WHERE kind = ? AND hour >= ? "
+            "GROUP BY target_id ORDER BY total DESC, target_id LIMIT ?",
+            (kind, since, limit),
+        )
+        return [{"id": r[0], "count": r[1]} for r in rows]
+
+class SqliteStorage:
+    def __init__(self, path: str, busy_timeout: float = 0.1):
+        # Queries run inline on the event loop: they are local and sub-millisecond, so a thread hop
+        # would cost more than the query itself. That only holds with one worker owning the file;
+        # the short busy timeout bounds how long a stray second writer can stall the loop
+        # (the write fails with "database is locked" instead of blocking for sqlite3's default 5s).
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.profile = SqliteProfileRepo(self)
+        self.projects = SqliteDocumentRepo(self, "projects")
+        self.blog = SqliteDocumentRepo(self, "blog", columns=("date",), order="date DESC")
+        self.skills = SqliteDocumentRepo(self, "skills")
+        self.contact = SqliteContactRepo(self)
+        self.status = SqliteDocumentRepo(self, "status_checks")
+        self.stats = SqliteStatsRepo(self)
+
+    def write(self):
+        """Context manager for one committed write transaction."""
+        return _SqliteTransaction(self)
+
+    async def init(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+    async def apply_batch(self, writes: List[BatchWrite]) -> BatchOutcome:
+        """All writes run in one SQLite transaction: either every write lands or none does."""
+        repos = {"projects": self.projects, "blog": self.blog, "skills": self.skills}
+        i = 0
+        try:
+            with self.write():
+                for i, w in enumerate(writes):
+                    if w.collection == "profile":
+                        self.profile.upsert_sync(w.data)
+                    elif w.action == "replace":
+                        repos[w.collection].replace_sync(w.data)
+                    elif w.action == "delete":
+                        repos[w.collection].delete_sync(w.id)
+                    elif w.action == "update":
+                        repos[w.collection].update_sync(w.id, w.data)
+                    else:
+                        repos[w.collection].insert_sync(w.data)
+        except sqlite3.Error as e:
+            return BatchOutcome(True, i, str(e))
+        return BatchOutcome(True)
+
+class _SqliteTransaction:
+    def __init__(self, storage: SqliteStorage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.storage.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+
+def create_storage(backend: str, mongo_url: Optional[str] = None, db_name: Optional[str] = None,
+                   sqlite_path: Optional[str] = None):
+    if backend == "mongo":
+        if not mongo_url or not db_name:
+            raise RuntimeError("MONGO_URL and DB_NAME are required for the mongo storage backend")
+        return MongoStorage(mongo_url, db_name)
+    if backend == "sqlite":
+        return SqliteStorage(sqlite_path or "portfolio.db")
+    raise RuntimeError(f"Unknown STORAGE_BACKEND '{backend}' (expected 'mongo' or 'sqlite')")
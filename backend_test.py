@@ -370,6 +370,41 @@ class PortfolioAPITester:
             self.log_test("Contact endpoint", False, f"Exception: {str(e)}")
         return False
         
+    def test_events_endpoints(self):
+        """Test POST /api/events beacon and GET /api/stats/top"""
+        try:
+            response = self.session.post(f"{BASE_URL}/events", data=json.dumps({"kind": "blog_view", "id": "test-post"}),
+                                         headers={"Content-Type": "text/plain"})
+            if response.status_code != 204:
+                self.log_test("POST /api/events", False, f"Status: {response.status_code}")
+                return False
+            self.log_test("POST /api/events", True)
+
+            response = self.session.get(f"{BASE_URL}/stats/top", params={"kind": "blog_view", "limit": 5})
+            if response.status_code == 200 and isinstance(response.json(), list):
+                self.log_test("GET /api/stats/top", True, f"Got {len(response.json())} entries")
+                return True
+            else:
+                self.log_test("GET /api/stats/top", False, f"Status: {response.status_code}")
+
+        except Exception as e:
+            self.log_test("Events endpoints", False, f"Exception: {str(e)}")
+        return False
+        
+    def test_stream_endpoint(self):
+        """Test GET /api/stream opens an SSE stream"""
+        try:
+            with self.session.get(f"{BASE_URL}/stream", stream=True, timeout=10) as response:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code == 200 and content_type.startswith("text/event-stream"):
+                    first = next(response.iter_lines(decode_unicode=True), "")
+                    self.log_test("GET /api/stream", True, f"First line: {first}")
+                    return True
+                self.log_test("GET /api/stream", False, f"Status: {response.status_code}, Content-Type: {content_type}")
+        except Exception as e:
+            self.log_test("Stream endpoint", False, f"Exception: {str(e)}")
+        return False
+        
     def check_cors_headers(self):
         """Check if CORS headers are present"""
         try:
@@ -411,6 +446,8 @@ class PortfolioAPITester:
             ("Skills Endpoints", self.test_skills_endpoints),
             ("Blog Endpoints", self.test_blog_endpoints),
             ("Contact Endpoint", self.test_contact_endpoint),
+            ("Events Endpoints", self.test_events_endpoints),
+            ("Stream Endpoint", self.test_stream_endpoint),
             ("CORS Headers", self.check_cors_headers)
         ]
         
@@ -29,6 +29,26 @@ export const deleteBlog = async (id) => http.delete(`/blog/${id}`).then(r=>r.dat
 // Contact
 export const postContact = async (payload) => http.post(`/contact`, payload).then(r=>r.data);
 
+// Analytics – fire-and-forget; sendBeacon survives navigation and sends text/plain (no CORS preflight)
+export const trackEvent = (kind, id) => {
+  const body = JSON.stringify({ kind, id });
+  if (typeof navigator !== 'undefined' && navigator.sendBeacon) { navigator.sendBeacon(`${API}/events`, body); return; }
+  http.post(`/events`, body, { headers: { 'Content-Type': 'text/plain' } }).catch(()=>{});
+};
+// Live updates – SSE; handler gets { type, action, id, ...fields }. Returns an unsubscribe function.
+// Events sent while disconnected are lost, so every reconnect is reported as a `reset`.
+export const subscribeUpdates = (onEvent) => {
+  if (typeof EventSource === 'undefined') return () => {};
+  const es = new EventSource(`${API}/stream`);
+  let opened = false;
+  es.addEventListener('open', () => { if (opened) onEvent({ type: 'reset' }); opened = true; });
+  ['profile', 'projects', 'skills', 'blog', 'reset'].forEach((type) =>
+    es.addEventListener(type, (e) => { try { onEvent(JSON.parse(e.data)); } catch {} })
+  );
+  return () => es.close();
+};
+export const topStats = async (kind = 'blog_view', params = {}) => http.get(`/stats/top`, { params: { kind, ...params } }).then(r=>r.data);
+
 // Seed helpers (dev only) – avoids duplicates with localStorage flag
 export async function ensureSeed(seed) {
   const seededKey = `portfolio_seed_done_v2`;
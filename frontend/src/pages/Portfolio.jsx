@@ -11,7 +11,7 @@ import { Toaster } from "../components/ui/toaster";
 import { Github, Linkedin, Mail, MapPin, Download, ExternalLink, ArrowRight, Rocket, GraduationCap, Brain, Wrench, Sun, Moon } from "lucide-react";
 import { useTheme } from "next-themes";
 import Hero3D from "../components/Hero3D";
-import { ensureSeed, getProfile, putProfile, listProjects, getSkills, listBlog, updateBlog, postContact } from "../lib/api";
+import { ensureSeed, getProfile, putProfile, listProjects, getSkills, listBlog, getBlog, updateBlog, postContact, trackEvent, subscribeUpdates } from "../lib/api";
 
 // Accent variables updated to cyan/blue scheme per preference
 const Accent = {
@@ -227,10 +227,10 @@ function Projects({ items }) {
                 </div>
                 <div className="mt-4 flex gap-2">
                   <Button asChild size="sm" className="gap-1" style={{backgroundColor: Accent.primary, color: "#0b0c0b"}}>
-                    <a href={p.live || "#"} target="_blank" rel="noreferrer"><ExternalLink size={14} /> Live</a>
+                    <a href={p.live || "#"} target="_blank" rel="noreferrer" onClick={() => trackEvent("project_click", p.id)}><ExternalLink size={14} /> Live</a>
                   </Button>
                   <Button asChild size="sm" variant="outline" className="gap-1">
-                    <a href={p.repo || "#"} target="_blank" rel="noreferrer"><Github size={14} /> Code</a>
+                    <a href={p.repo || "#"} target="_blank" rel="noreferrer" onClick={() => trackEvent("project_click", p.id)}><Github size={14} /> Code</a>
                   </Button>
                 </div>
               </CardContent>
@@ -305,7 +305,7 @@ function Blog({ posts, onLike }) {
               <CardContent>
                 <p className="text-sm text-foreground/90">{b.excerpt}</p>
                 <div className="mt-4 flex gap-2">
-                  <Button size="sm" onClick={() => alert(b.content)}>Read</Button>
+                  <Button size="sm" onClick={() => { trackEvent("blog_view", b.id); alert(b.content); }}>Read</Button>
                   <Button size="sm" variant="outline" onClick={() => onLike?.(b)}>Like • {b.likes ?? 0}</Button>
                 </div>
               </CardContent>
@@ -441,6 +441,22 @@ export default function PortfolioPage() {
     });
   }, []);
 
+  // Live updates: apply likes from the event, refetch just an edited post, otherwise only the list that changed
+  useEffect(() => subscribeUpdates((ev) => {
+    if (ev.type === 'blog' && ev.action === 'updated' && ev.id) {
+      if (ev.changed && ev.changed.every(f => f === 'likes')) {
+        setPosts((prev) => prev.map(x => x.id === ev.id ? { ...x, likes: ev.likes } : x));
+      } else {
+        getBlog(ev.id).then((post) => setPosts((prev) => prev.map(x => x.id === post.id ? post : x))).catch(()=>{});
+      }
+      return;
+    }
+    if (ev.type === 'profile' || ev.type === 'reset') getProfile().then(setProfile).catch(()=>{});
+    if (ev.type === 'projects' || ev.type === 'reset') listProjects().then(setProjects).catch(()=>{});
+    if (ev.type === 'skills' || ev.type === 'reset') getSkills().then(setSkills).catch(()=>{});
+    if (ev.type === 'blog' || ev.type === 'reset') listBlog().then(setPosts).catch(()=>{});
+  }), []);
+
   const handleLike = async (b) => {
     try {
       const updated = { ...b, likes: (b.likes || 0) + 1 };
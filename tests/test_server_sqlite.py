@@ -0,0 +1,333 @@
+"""API tests on the embedded in-memory SQLite backend (no MongoDB server needed)."""
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("ADMIN_TOKEN", "test-token")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+import storage  # noqa: E402
+
+ADMIN = {"x-admin-token": os.environ["ADMIN_TOKEN"]}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fresh = storage.SqliteStorage(":memory:")
+    monkeypatch.setattr(server, "storage", fresh)
+    yield fresh
+    fresh.close()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(server.app) as c:
+        yield c
+
+
+def project(**overrides):
+    return {"title": "Portfolio", "description": "d", "category": "web", "year": 2024, **overrides}
+
+
+def post(**overrides):
+    return {"title": "Post", "excerpt": "e", "content": "c", "date": "2024-01-01", **overrides}
+
+
+# ===================== Repositories =====================
+def test_profile_upsert_keeps_stored_id(db):
+    asyncio.run(db.profile.upsert({"id": "first", "full_name": "A"}))
+    asyncio.run(db.profile.upsert({"id": "second", "full_name": "B"}))
+    assert asyncio.run(db.profile.get()) == {"id": "first", "full_name": "B"}
+
+
+def test_document_repo_crud_and_blog_order(db):
+    asyncio.run(db.blog.insert({"id": "old", "date": "2020-01-01"}))
+    asyncio.run(db.blog.insert({"id": "new", "date": "2024-01-01"}))
+    assert [d["id"] for d in asyncio.run(db.blog.list())] == ["new", "old"]
+
+    asyncio.run(db.blog.update("old", {"date": "2025-01-01", "likes": 2}))
+    assert asyncio.run(db.blog.get("old")) == {"id": "old", "date": "2025-01-01", "likes": 2}
+    assert [d["id"] for d in asyncio.run(db.blog.list())] == ["old", "new"]
+
+    asyncio.run(db.blog.delete("old"))
+    assert asyncio.run(db.blog.get("old")) is None
+
+
+def test_stats_increment_accumulates(db):
+    asyncio.run(db.stats.increment([("blog_view", "a", "h1", 2), ("blog_view", "b", "h1", 1)]))
+    asyncio.run(db.stats.increment([("blog_view", "b", "h2", 5), ("project_click", "a", "h2", 9)]))
+    assert asyncio.run(db.stats.top("blog_view", "h0", 10)) == [{"id": "b", "count": 6}, {"id": "a", "count": 2}]
+    assert asyncio.run(db.stats.top("blog_view", "h2", 10)) == [{"id": "b", "count": 5}]
+
+
+# ===================== Admin batch =====================
+def test_batch_applies_ops_and_reports_each(client):
+    resp = client.post("/api/admin/batch", headers=ADMIN, json={"ops": [
+        {"collection": "projects", "action": "create", "data": project(id="p1")},
+        {"collection": "blog", "action": "create", "data": post(id="b1")},
+        {"collection": "blog", "action": "update", "id": "b1", "data": post(likes=3)},
+        {"collection": "skills", "action": "replace", "data": [{"group": "Backend", "items": []}]},
+        {"collection": "profile", "action": "upsert", "data": {"full_name": "A", "title": "T"}},
+    ]}).json()
+    assert resp["ok"] is True and resp["transactional"] is True
+    assert [(r["index"], r["id"], r["ok"]) for r in resp["results"]] == [
+        (0, "p1", True), (1, "b1", True), (2, "b1", True), (3, None, True), (4, None, True),
+    ]
+    assert client.get("/api/blog/b1").json()["likes"] == 3
+    assert [g["group"] for g in client.get("/api/skills").json()] == ["Backend"]
+    assert client.get("/api/profile").json()["full_name"] == "A"
+
+
+def test_batch_failure_rolls_back_everything(client, db, monkeypatch):
+    insert = db.blog.insert_sync
+
+    def failing_insert(doc):
+        if doc["id"] == "boom":
+            raise sqlite3.IntegrityError("forced failure")
+        insert(doc)
+
+    monkeypatch.setattr(db.blog, "insert_sync", failing_insert)
+    resp = client.post("/api/admin/batch", headers=ADMIN, json={"ops": [
+        {"collection": "projects", "action": "create", "data": project(id="p1")},
+        {"collection": "blog", "action": "create", "data": post(id="boom")},
+        {"collection": "blog", "action": "create", "data": post(id="b2")},
+    ]}).json()
+    assert resp["ok"] is False
+    assert [r["ok"] for r in resp["results"]] == [False, False, False]
+    assert resp["results"][1]["error"] == "forced failure"
+    assert client.get("/api/projects").json() == []
+
+
+def test_batch_reports_unknown_outcomes(client, db, monkeypatch):
+    async def lost_connection(writes):
+        return storage.BatchOutcome(False, 1, "connection reset", unknown=2)
+
+    monkeypatch.setattr(db, "apply_batch", lost_connection)
+    resp = client.post("/api/admin/batch", headers=ADMIN, json={"ops": [
+        {"collection": "projects", "action": "create", "data": project(id="p1")},
+        {"collection": "blog", "action": "create", "data": post(id="b1")},
+        {"collection": "blog", "action": "delete", "id": "b0"},
+    ]}).json()
+    assert resp["ok"] is False
+    assert [r["ok"] for r in resp["results"]] == [True, None, None]
+    assert resp["results"][1]["error"] == "connection reset"
+
+
+@pytest.mark.parametrize("op, detail", [
+    ({"collection": "skills", "action": "replace", "data": "x"}, "ops[0].data must be a list of objects"),
+    ({"collection": "blog", "action": "create", "data": "x"}, "ops[0].data must be an object"),
+    ({"collection": "skills", "action": "delete", "id": "x"}, "ops[0]: action 'delete' is not supported on 'skills'"),
+    ({"collection": "blog", "action": "delete"}, "ops[0]: id is required"),
+])
+def test_batch_rejects_bad_ops_before_writing(client, op, detail):
+    resp = client.post("/api/admin/batch", headers=ADMIN, json={"ops": [op]})
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == detail
+
+
+def test_batch_reports_invalid_data_fields_without_input(client):
+    resp = client.post("/api/admin/batch", headers=ADMIN, json={"ops": [
+        {"collection": "blog", "action": "create", "data": post()},
+        {"collection": "skills", "action": "replace", "data": [{"group": "A", "items": []}, {"items": "secret"}]},
+    ]})
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == [
+        {"loc": ["body", "ops", 1, "data", 1, "group"], "msg": "Field required", "type": "missing"},
+        {"loc": ["body", "ops", 1, "data", 1, "items"], "msg": "Input should be a valid list", "type": "list_type"},
+    ]
+    assert client.get("/api/blog").json() == []
+
+
+def test_batch_requires_admin_token(client):
+    assert client.post("/api/admin/batch", json={"ops": []}).status_code == 401
+
+
+# ===================== Contact inbox =====================
+@pytest.fixture
+def inbox(client):
+    for i in range(7):
+        client.post("/api/contact", json={
+            "name": f"n{i}", "email": "odd@x.io" if i % 2 else "even@x.io", "message": f"hello {i}",
+        })
+    return client
+
+
+def test_inbox_keyset_pages_cover_every_message_once(inbox):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = inbox.get("/api/admin/contact", headers=ADMIN, params=params).json()
+        seen += [m["name"] for m in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"n{i}" for i in range(6, -1, -1)]
+
+
+def test_inbox_filters_by_email_and_date(inbox):
+    page = inbox.get("/api/admin/contact", headers=ADMIN, params={"email": "odd@x.io"}).json()
+    assert [m["name"] for m in page["items"]] == ["n5", "n3", "n1"]
+    page = inbox.get("/api/admin/contact", headers=ADMIN, params={"until": "2000-01-01T00:00:00"}).json()
+    assert page == {"items": [], "next_cursor": None}
+
+
+def test_inbox_rejects_bad_cursor(inbox):
+    resp = inbox.get("/api/admin/contact", headers=ADMIN, params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+def test_export_ndjson_streams_oldest_first(inbox):
+    resp = inbox.get("/api/admin/contact/export", headers=ADMIN, params={"format": "ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["name"] for r in rows] == [f"n{i}" for i in range(7)]
+
+
+def test_export_csv_escapes_formulas(client):
+    client.post("/api/contact", json={"name": "=HYPERLINK()", "email": "a@x.io", "message": "=cmd|' /C calc'!A0"})
+    resp = client.get("/api/admin/contact/export", headers=ADMIN)
+    assert resp.headers["content-type"].startswith("text/csv")
+    header, row = resp.text.splitlines()
+    assert header == "id,name,email,message,created_at"
+    assert ",'=HYPERLINK(),a@x.io,'=cmd|' /C calc'!A0," in row
+
+
+# ===================== Trusted reads =====================
+def test_unversioned_documents_are_migrated_on_read(client, db):
+    asyncio.run(db.blog.insert({"id": "legacy", **post(), "stray": 1}))
+    asyncio.run(db.profile.upsert({"id": "pid", "full_name": "A", "title": "T"}))
+
+    assert client.get("/api/blog/legacy").json() == {"id": "legacy", **post(), "tags": [], "likes": 0}
+    stored = asyncio.run(db.blog.get("legacy"))
+    assert stored[storage.SCHEMA_VERSION_FIELD] == server.SCHEMA_VERSION
+    assert stored["likes"] == 0
+
+    assert client.get("/api/profile").json()["id"] == "pid"
+    assert asyncio.run(db.profile.get())[storage.SCHEMA_VERSION_FIELD] == server.SCHEMA_VERSION
+
+
+def test_current_documents_are_served_without_version_field(client):
+    client.post("/api/projects", json=project(id="p1"))
+    assert client.get("/api/projects").json() == [{**project(id="p1"), "tags": [], "live": None, "repo": None}]
+
+
+# ===================== Analytics =====================
+def test_event_counters_drain_per_kind_target_hour(monkeypatch):
+    monkeypatch.setattr(server, "STATS_MAX_TARGETS", 2)
+    counters = server.EventCounters()
+    counters.add("blog_view", "a", "h1")
+    counters.add("blog_view", "b", "h1", 3)
+    counters.add("project_click", "a", "h2")
+    assert counters.add("blog_view", "c", "h1") is False
+    assert sorted(counters.drain()) == [("blog_view", "a", "h1", 1), ("blog_view", "b", "h1", 3), ("project_click", "a", "h2", 1)]
+    assert counters.drain() == []
+
+
+def test_beacon_counts_reach_top_after_flush(client):
+    for bid in ("a", "b"):
+        client.post("/api/blog", json=post(id=bid))
+    assert client.post("/api/events", content='{"kind": "blog_view", "id": "a"}',
+                       headers={"Content-Type": "text/plain"}).status_code == 204
+    client.post("/api/events", json=[{"kind": "blog_view", "id": "b"}, {"kind": "blog_view", "id": "b"}])
+    assert client.post("/api/events", content="not json").status_code == 422
+    client.portal.call(server.flush_event_counters)
+    assert client.get("/api/stats/top").json() == [{"id": "b", "count": 2}, {"id": "a", "count": 1}]
+
+
+def test_beacon_ignores_unknown_targets(client):
+    client.post("/api/projects", json=project(id="p1"))
+    client.post("/api/events", json=[{"kind": "project_click", "id": "p1"}, {"kind": "project_click", "id": "junk"},
+                                     {"kind": "blog_view", "id": "p1"}])
+    client.post("/api/blog", json=post(id="late"))
+    client.post("/api/events", json={"kind": "blog_view", "id": "late"})
+    client.portal.call(server.flush_event_counters)
+    assert client.get("/api/stats/top", params={"kind": "project_click"}).json() == [{"id": "p1", "count": 1}]
+    assert client.get("/api/stats/top").json() == [{"id": "late", "count": 1}]
+
+
+def test_beacon_rejects_large_bodies_before_parsing(client):
+    events = json.dumps([{"kind": "blog_view", "id": "x"}] * 1000)
+    assert client.post("/api/events", content=events).status_code == 413
+
+    def chunks():
+        yield events.encode()
+
+    assert client.post("/api/events", content=chunks()).status_code == 413
+
+
+# ===================== Live updates =====================
+def test_broadcaster_drops_slow_consumer_and_closes():
+    async def scenario():
+        b = server.Broadcaster(queue_size=2)
+        slow, fast = b.subscribe(), b.subscribe()
+        for i in range(3):
+            b.publish({"type": "blog", "n": i})
+            fast.get_nowait()
+        assert slow.get_nowait() is server.Broadcaster.RESET
+        assert b.subscribers == {fast}
+
+        b.close()
+        assert fast.get_nowait() is None
+        assert b.subscribe().get_nowait() is None
+        b.open()
+        assert b.subscribe().empty()
+
+    asyncio.run(scenario())
+
+
+def read_stream_with_one_event(client):
+    def publish_once_subscribed():
+        while not server.broadcaster.subscribers:
+            time.sleep(0.01)
+        q = next(iter(server.broadcaster.subscribers))
+        client.portal.call(functools.partial(server.notify, "blog", "updated", "b1", likes=3))
+        while not q.empty():
+            time.sleep(0.01)
+        client.portal.call(server.broadcaster.close)
+
+    publisher = threading.Thread(target=publish_once_subscribed, daemon=True)
+    publisher.start()
+    resp = client.get("/api/stream")
+    publisher.join(timeout=5)
+    return resp
+
+
+def test_stream_sends_events_in_every_app_lifespan(db):
+    for _ in range(2):
+        with TestClient(server.app) as client:
+            resp = read_stream_with_one_event(client)
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert resp.text == (
+            "retry: 3000\n\n"
+            'event: blog\ndata: {"type": "blog", "action": "updated", "id": "b1", "likes": 3}\n\n'
+        )
+
+
+def test_blog_update_event_lists_changed_fields(client, monkeypatch):
+    client.post("/api/blog", json=post(id="b1"))
+    events = []
+    monkeypatch.setattr(server.broadcaster, "publish", events.append)
+    client.put("/api/blog/b1", json=post(likes=1))
+    client.put("/api/blog/b1", json=post(likes=1, title="Edited"))
+    assert [e["changed"] for e in events] == [["likes"], ["title"]]
+    assert events[0] == {"type": "blog", "action": "updated", "id": "b1", "likes": 1, "changed": ["likes"]}
+
+
+def test_skills_replace_publishes_one_event(client, monkeypatch):
+    events = []
+    monkeypatch.setattr(server.broadcaster, "publish", events.append)
+    client.put("/api/skills", json=[{"group": "Backend", "items": []}])
+    assert events == [{"type": "skills", "action": "replaced", "id": None}]
@@ -0,0 +1,117 @@
+"""MongoStorage.apply_batch against in-memory stand-ins for Motor's client and collections."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo import DeleteMany, InsertOne
+from pymongo.errors import AutoReconnect, BulkWriteError, OperationFailure
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from storage import BatchOutcome, BatchWrite, MongoStorage  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self, name, calls, fail):
+        self.name, self.calls, self.fail = name, calls, fail
+
+    async def bulk_write(self, requests, ordered, session=None):
+        self.calls.append((self.name, requests, ordered, session))
+        if self.name in self.fail:
+            raise self.fail[self.name]
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, callback):
+        return await callback(self)
+
+
+class FakeAdmin:
+    def __init__(self, hello):
+        self.hello, self.probes = hello, 0
+
+    async def command(self, name):
+        self.probes += 1
+        if isinstance(self.hello, Exception):
+            raise self.hello
+        return self.hello
+
+
+class FakeClient:
+    def __init__(self, hello):
+        self.admin = FakeAdmin(hello)
+
+    async def start_session(self):
+        return FakeSession()
+
+
+def mongo(hello=None, fail=None):
+    store = MongoStorage("mongodb://localhost:1", "test")
+    store.client = FakeClient({} if hello is None else hello)
+    store.calls = []
+    store.db = {name: FakeCollection(name, store.calls, fail or {}) for name in ("projects", "blog", "skills", "profile")}
+    return store
+
+
+WRITES = [
+    BatchWrite("projects", "create", "p1", {"id": "p1"}),
+    BatchWrite("projects", "delete", "p0"),
+    BatchWrite("skills", "replace", data=[{"group": "A"}, {"group": "B"}]),
+    BatchWrite("blog", "update", "b1", {"id": "b1", "likes": 1}),
+    BatchWrite("blog", "create", "b2", {"id": "b2"}),
+]
+
+
+def bulk_error(index, errmsg="E11000 duplicate key"):
+    return BulkWriteError({"writeErrors": [{"index": index, "code": 11000, "errmsg": errmsg}]})
+
+
+def test_consecutive_writes_share_one_ordered_bulk_write():
+    store = mongo()
+    assert asyncio.run(store.apply_batch(WRITES)) == BatchOutcome(False)
+    assert [(name, len(reqs), ordered) for name, reqs, ordered, _ in store.calls] == [
+        ("projects", 2, True), ("skills", 3, True), ("blog", 2, True),
+    ]
+    assert isinstance(store.calls[1][1][0], DeleteMany) and isinstance(store.calls[1][1][2], InsertOne)
+
+
+@pytest.mark.parametrize("hello, transactional", [
+    ({"setName": "rs0"}, True),
+    ({"msg": "isdbgrid"}, True),
+    ({"isWritablePrimary": True}, False),
+    (OperationFailure("not authorized"), False),
+])
+def test_transactions_used_only_on_replica_sets_and_mongos(hello, transactional):
+    store = mongo(hello)
+    assert asyncio.run(store.apply_batch(WRITES[:1])).transactional is transactional
+    asyncio.run(store.apply_batch(WRITES[:1]))
+    assert store.client.admin.probes == 1
+    assert all((session is not None) is transactional for *_, session in store.calls)
+
+
+@pytest.mark.parametrize("collection, index, failed_at", [
+    ("projects", 1, 1),
+    ("skills", 0, 2),
+    ("skills", 2, 2),
+    ("blog", 1, 4),
+])
+def test_bulk_write_error_maps_back_to_its_op(collection, index, failed_at):
+    store = mongo(fail={collection: bulk_error(index)})
+    assert asyncio.run(store.apply_batch(WRITES)) == BatchOutcome(False, failed_at, "E11000 duplicate key")
+
+
+def test_connection_error_marks_the_whole_group_unknown():
+    store = mongo(fail={"blog": AutoReconnect("connection reset")})
+    assert asyncio.run(store.apply_batch(WRITES)) == BatchOutcome(False, 3, "connection reset", unknown=2)
+
+
+def test_connection_error_in_transaction_applies_nothing():
+    store = mongo({"setName": "rs0"}, fail={"skills": AutoReconnect("connection reset")})
+    assert asyncio.run(store.apply_batch(WRITES)) == BatchOutcome(True, 2, "connection reset")